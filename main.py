@@ -1,7 +1,18 @@
+import io
 import os
+import time
+import operator
+import shutil
 import asyncio
 import tempfile
+import concurrent.futures
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 import httpx
+import orjson
+import xxhash
 import yt_dlp
 from openai import AsyncOpenAI
 from typing import Optional
@@ -11,6 +22,160 @@ from astrbot.api.star import Context, Star, register, ConfigSchema, ConfigSchema
 from astrbot.api import logger
 from astrbot.api.provider import ProviderManager
 
+# 临时音频优先落在 tmpfs (/dev/shm): ffmpeg 写、转录读、用完即删,
+# 全程不必经过真实磁盘
+_AUDIO_TMPDIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _unlink_best_effort(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error(f"URLSummarizer: 清理临时文件 {path} 失败。 错误: {e}")
+
+
+# 固定不变的指令前缀: 作为 inputs 一并下发, Dify 工作流应按
+# system_prefix + 转录文本 的顺序拼接提示词 —— 长而稳定的内容在前、
+# 变长的文稿在后, 上游 LLM 的 prompt/KV 缓存才能跨调用命中。
+# 字节级一致才有缓存价值, 勿随手改动措辞。
+_DIFY_SYSTEM_PREFIX = (
+    "你是一名音视频内容总结助手。请根据给出的转录文稿, 用中文输出一段"
+    "简明扼要的总结: 先用一两句话概括主题, 再分点列出关键信息和结论, "
+    "保留重要的数字、人名和时间, 不要编造文稿之外的内容。"
+)
+
+
+# 长文稿 map-reduce: 超过阈值的转录切成 ~4k token (按字符近似) 的块
+# 并行总结, 再用一次合并调用收尾
+_MAP_REDUCE_THRESHOLD = 16000
+_MAP_CHUNK_CHARS = 16000
+
+
+def _split_text(text: str, chunk_chars: int) -> list:
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            # 尽量在换行或句号处断开, 避免把一句话劈成两半
+            cut = max(text.rfind(sep, start, end) for sep in ("\n", "。", ". "))
+            if cut > start:
+                end = cut + 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+# 总结结果缓存: 按规范化 URL 记忆最终总结, 命中时跳过整条
+# 下载 -> 转录 -> 总结 流水线
+_SUMMARY_CACHE_MAXSIZE = 128
+_SUMMARY_CACHE_TTL = 3600.0
+
+# 常见跟踪参数, 不参与缓存键 (utm_* 前缀另行过滤)
+_TRACKING_PARAMS = {"fbclid", "gclid", "si", "feature", "spm_id_from", "vd_source"}
+
+
+def _normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.startswith("utm_") and k not in _TRACKING_PARAMS
+    ]
+    # 主机名不区分大小写, fragment 不影响服务端内容
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path,
+        urlencode(query),
+        "",
+    ))
+
+
+# 转录结果磁盘缓存: 按音频内容哈希存储, 同一段音频 (哪怕换了 URL 或重新
+# 上传) 不再重复调用 Whisper; 按 mtime 做 LRU 淘汰
+_TRANSCRIPT_CACHE_DIR = Path(tempfile.gettempdir()) / "urlsum_trans"
+_TRANSCRIPT_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+
+def _transcript_cache_read(digest: str) -> Optional[str]:
+    path = _TRANSCRIPT_CACHE_DIR / f"{digest}.txt"
+    try:
+        text = path.read_text(encoding="utf-8")
+        path.touch()  # 刷新 mtime, 供淘汰时判定冷热
+    except OSError:
+        return None
+    return text
+
+
+def _transcript_cache_write(digest: str, text: str):
+    try:
+        _TRANSCRIPT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path = _TRANSCRIPT_CACHE_DIR / f"{digest}.txt"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)  # 原子替换, 避免读到半个文件
+        _transcript_cache_evict()
+    except OSError as e:
+        logger.error(f"URLSummarizer: 写入转录缓存失败: {e}")
+
+
+def _transcript_cache_evict():
+    entries = []
+    for path in _TRANSCRIPT_CACHE_DIR.glob("*.txt"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= _TRANSCRIPT_CACHE_MAX_BYTES:
+            break
+        try:
+            path.unlink()
+            total -= size
+        except OSError:
+            pass
+
+
+# 模块级共享的 httpx 客户端: 插件重载时保留 keepalive 连接池, 按引用计数在
+# 最后一个使用者 terminate() 时才真正关闭
+_shared_client: Optional[httpx.AsyncClient] = None
+_shared_client_refcount = 0
+_shared_client_lock = asyncio.Lock()
+
+
+async def _acquire_shared_client() -> httpx.AsyncClient:
+    global _shared_client, _shared_client_refcount
+    async with _shared_client_lock:
+        if _shared_client is None or _shared_client.is_closed:
+            _shared_client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(300.0, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=20,
+                    max_keepalive_connections=10,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            _shared_client_refcount = 0
+        _shared_client_refcount += 1
+        return _shared_client
+
+
+async def _release_shared_client():
+    global _shared_client, _shared_client_refcount
+    async with _shared_client_lock:
+        if _shared_client is None:
+            return
+        _shared_client_refcount -= 1
+        if _shared_client_refcount <= 0:
+            await _shared_client.aclose()
+            _shared_client = None
+
+
 # 1. 定义你的插件配置项 (这将自动生成 WebUI)
 plugin_config_schema = ConfigSchema(
     version="1.3.0",
@@ -34,13 +199,26 @@ plugin_config_schema = ConfigSchema(
         ),
         "dify_input_variable": ConfigSchemaType.STRING(
             title="Dify 输入变量名",
-            description="Dify 工作流 '开始' 节点中接收文本的变量名",
+            description="Dify 工作流 '开始' 节点中接收文本的变量名。插件会额外传入 "
+                        "system_prefix 变量, 工作流按 system_prefix + 该变量 的顺序拼接"
+                        "提示词可复用上游的 prompt 缓存。",
             default="transcript"
         ),
         "dify_answer_key": ConfigSchemaType.STRING(
             title="Dify 回复字段名",
             description="Dify 返回的 JSON 中代表最终答案的字段名",
             default="answer"
+        ),
+        "stt_backend": ConfigSchemaType.STRING(
+            title="STT 后端",
+            description="openai: 走 OpenAI Whisper API; faster_whisper: 本地 CTranslate2 "
+                        "int8 转录, 无需上传音频 (需 pip install faster-whisper)。",
+            default="openai"
+        ),
+        "max_audio_seconds": ConfigSchemaType.INT(
+            title="最长音频时长 (秒)",
+            description="超过该时长的 URL 直接拒绝, 不消耗下载/转录额度。0 表示不限制。",
+            default=0
         )
     }
 )
@@ -60,10 +238,29 @@ class URLSummarizerPlugin(Star):
         self.is_configured = False
         self.openai_client = None
         self.dify_api_key = None
+        self._dify_headers: dict = {}
+        # 首个成功响应后绑定的取值器, schema 稳定时免去逐层探测
+        self._answer_getter = None
         self.dify_workflow_url = self.config.get("dify_workflow_url")
         self.dify_input_variable = self.config.get("dify_input_variable", "transcript")
         self.dify_answer_key = self.config.get("dify_answer_key", "answer")
-        self.httpx_client = httpx.AsyncClient(timeout=300.0)
+        self.max_audio_seconds = int(self.config.get("max_audio_seconds", 0) or 0)
+        self.stt_backend = self.config.get("stt_backend", "openai")
+        self._local_whisper = None
+        # 共享客户端在首次使用时通过 _get_httpx_client() 惰性获取;
+        # 获取过程加锁, 保证每个实例对引用计数只贡献一次
+        self._httpx_client: Optional[httpx.AsyncClient] = None
+        self._httpx_client_lock = asyncio.Lock()
+        # LRU + TTL: {规范化 URL: (写入时间戳, 总结文本)}
+        self._summary_cache: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        # single-flight: {规范化 URL: 进行中的总结 Future},
+        # 同一 URL 的并发请求合并成一条流水线
+        self._inflight: "dict[str, asyncio.Future]" = {}
+        # 重资源 (线程池 / YoutubeDL / 本地 Whisper 模型) 等配置校验
+        # 通过后再建, 配置错误的实例不会白白占用线程和内存
+        self._ytdlp_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._ydl: Optional[yt_dlp.YoutubeDL] = None
+        self._ydl_lock = asyncio.Lock()
 
         try:
             # 3. 从配置中读取被选中的 "ID"
@@ -90,10 +287,63 @@ class URLSummarizerPlugin(Star):
             dify_provider_inst = provider_manager.get_provider_instance(dify_provider_id)
             if dify_provider_inst and hasattr(dify_provider_inst, "api_key"):
                 self.dify_api_key = dify_provider_inst.api_key
+                # 认证头只拼一次; 客户端跨实例共享, 不能挂在其默认头上
+                self._dify_headers = {
+                    "Authorization": f"Bearer {self.dify_api_key}",
+                    "Content-Type": "application/json"
+                }
             else:
                 logger.error(f"URLSummarizer: 未找到 ID 为 '{dify_provider_id}' 的 Dify 提供商, 或其缺少 'api_key'。")
                 return
 
+            if self.stt_backend == "faster_whisper":
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError:
+                    logger.error(
+                        "URLSummarizer: 未安装 faster-whisper (pip install faster-whisper), "
+                        "回退到 OpenAI STT。"
+                    )
+                    self.stt_backend = "openai"
+                else:
+                    # 启动时加载一次; int8 量化的 CTranslate2 后端,
+                    # 本地转录省掉整段音频的上传和 API 延迟
+                    self._local_whisper = WhisperModel(
+                        "base", device="auto", compute_type="int8"
+                    )
+
+            # yt-dlp 专用线程池: 不占用 asyncio 默认执行器,
+            # 避免并发下载饿死进程内其他 to_thread 任务
+            self._ytdlp_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="ytdlp"
+            )
+            # 有 aria2c 时用多连接分段下载, 没有则静默退回 yt-dlp 内置下载器
+            self._has_aria2c = shutil.which("aria2c") is not None
+
+            # 复用同一个 YoutubeDL 实例, 免去每次调用重复的 extractor 注册和
+            # 选项解析; 实例不是并发安全的, 每次下载前在 _ydl_lock 内改 outtmpl
+            ydl_opts = {
+                'format': 'm4a-best/bestaudio/best',
+                'outtmpl': {'default': ''},
+                'quiet': True,
+                'no_warnings': True,
+                'postprocessors': [{
+                    'key': 'FFmpegExtractAudio',
+                    'preferredcodec': 'm4a',
+                    'preferredquality': '0',
+                }],
+                # AAC 源 FFmpegExtractAudio 自己就会用 acodec=copy 纯重封装,
+                # 无需干预; -threads 0 只影响非 AAC 的转码回退路径
+                'postprocessor_args': {'extractaudio': ['-threads', '0']},
+            }
+            if self._has_aria2c:
+                ydl_opts['external_downloader'] = 'aria2c'
+                ydl_opts['external_downloader_args'] = {
+                    'aria2c': ['-x', '8', '-s', '8',
+                               '--file-allocation=none', '--summary-interval=0'],
+                }
+            self._ydl = yt_dlp.YoutubeDL(ydl_opts)
+
             self.is_configured = True
             logger.info("URLSummarizer: 插件已成功加载并配置。")
 
@@ -107,91 +357,262 @@ class URLSummarizerPlugin(Star):
             yield event.plain_result("URLSummarizer 插件未配置或配置错误。请检查 WebUI 设置和日志。")
             return
 
+        cache_key = _normalize_url(url)
+        cached_summary = self._cache_get(cache_key)
+        if cached_summary is not None:
+            yield event.plain_result(f"总结 (缓存):\n{cached_summary}")
+            return
+
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            # 同一 URL 已有流水线在跑, 等它的结果, 不重复花
+            # 下载/Whisper/Dify 的成本
+            yield event.plain_result(f"该 URL 正在处理中, 请稍候...")
+            try:
+                summary = await asyncio.shield(inflight)
+            except Exception as e:
+                yield event.plain_result(f"处理 URL 失败。 错误: {str(e)}")
+                return
+            if summary is None:
+                yield event.plain_result(f"该 URL 已被跳过 (超过时长上限)。")
+            else:
+                yield event.plain_result(f"总结:\n{summary}")
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
         audio_path = None
         try:
             yield event.plain_result(f"收到 URL。正在处理音频...")
-            
-            audio_path = await self._download_audio(url)
-            
+
+            # 先取元数据: 比整段下载便宜得多, 坏 URL 和超长音频在
+            # 花费下载/转录成本之前就被拒绝
+            info = await self._extract_info(url)
+            duration = info.get("duration")
+            if self.max_audio_seconds > 0 and duration and duration > self.max_audio_seconds:
+                future.set_result(None)
+                yield event.plain_result(
+                    f"音频时长 {int(duration)} 秒, 超过上限 {self.max_audio_seconds} 秒, 已跳过。"
+                )
+                return
+
+            # 下载是网络+CPU (ffmpeg) 密集的, 期间顺带预热到 Dify 的连接,
+            # 后面的总结请求可以直接命中 keepalive 连接
+            audio_path, _ = await asyncio.gather(
+                self._download_audio(url),
+                self._warm_dify_connection(),
+            )
+
             yield event.plain_result(f"音频已下载。正在转录...")
-            
+
             transcript = await self._transcribe_audio(audio_path)
-            
+
             yield event.plain_result(f"文稿已生成。正在总结...")
-            
+
             summary = await self._summarize_text(transcript)
-            
+
+            self._cache_put(cache_key, summary)
+            future.set_result(summary)
             yield event.plain_result(f"总结:\n{summary}")
 
         except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                future.exception()  # 无人等待时也标记已取, 避免 GC 告警
             logger.error(f"URLSummarizer: 处理 {url} 失败。 错误: {e}")
             yield event.plain_result(f"处理 URL 失败。 错误: {str(e)}")
-        
+
         finally:
-            if audio_path and os.path.exists(audio_path):
-                try:
-                    os.remove(audio_path)
-                except Exception as e:
-                    logger.error(f"URLSummarizer: 清理临时文件 {audio_path} 失败。 错误: {e}")
+            self._inflight.pop(cache_key, None)
+            if not future.done():
+                future.cancel()
+            # 删除放到线程里执行, 慢文件系统上不阻塞事件循环;
+            # 不存在就当删过了, 省去一次 TOCTOU 式的 exists 预检
+            if audio_path:
+                await asyncio.to_thread(_unlink_best_effort, audio_path)
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        entry = self._summary_cache.get(key)
+        if entry is None:
+            return None
+        timestamp, summary = entry
+        if time.time() - timestamp > _SUMMARY_CACHE_TTL:
+            del self._summary_cache[key]
+            return None
+        self._summary_cache.move_to_end(key)
+        return summary
+
+    def _cache_put(self, key: str, summary: str):
+        self._summary_cache[key] = (time.time(), summary)
+        self._summary_cache.move_to_end(key)
+        while len(self._summary_cache) > _SUMMARY_CACHE_MAXSIZE:
+            self._summary_cache.popitem(last=False)
+
+    async def _extract_info(self, url: str) -> dict:
+        loop = asyncio.get_running_loop()
+        async with self._ydl_lock:
+            return await loop.run_in_executor(
+                self._ytdlp_pool,
+                lambda: self._ydl.extract_info(url, download=False),
+            )
 
     async def _download_audio(self, url: str) -> str:
-        with tempfile.NamedTemporaryFile(suffix=".m4a", delete=False) as tmpfile:
+        with tempfile.NamedTemporaryFile(dir=_AUDIO_TMPDIR, suffix=".m4a",
+                                         delete=False) as tmpfile:
             file_path = tmpfile.name
-        
-        ydl_opts = {
-            'format': 'm4a-best/bestaudio/best',
-            'outtmpl': file_path,
-            'quiet': True,
-            'no_warnings': True,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'm4a',
-            }],
-        }
-        
+
         loop = asyncio.get_running_loop()
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            await loop.run_in_executor(None, ydl.download, [url])
-        
+        async with self._ydl_lock:
+            self._ydl.params['outtmpl']['default'] = file_path
+            await loop.run_in_executor(self._ytdlp_pool, self._ydl.download, [url])
+
         return file_path
 
+    async def _warm_dify_connection(self):
+        try:
+            client = await self._get_httpx_client()
+            await client.head(self.dify_workflow_url, timeout=10.0)
+        except Exception:
+            # 预热失败不影响主流程 (部分网关不支持 HEAD)
+            pass
+
     async def _transcribe_audio(self, file_path: str) -> str:
-        with open(file_path, "rb") as audio_file:
+        # 一次性在线程中读入内存, 既不在事件循环上做同步文件 IO,
+        # 也避免上传阶段反复回读磁盘; SDK 按 .name 的扩展名识别格式
+        audio_bytes = await asyncio.to_thread(Path(file_path).read_bytes)
+
+        # 按内容哈希查磁盘缓存, Whisper 是流水线中最贵的一步
+        digest = xxhash.xxh3_128(audio_bytes).hexdigest()
+        cached_transcript = await asyncio.to_thread(_transcript_cache_read, digest)
+        if cached_transcript is not None:
+            return cached_transcript
+
+        if self._local_whisper is not None:
+            transcript = await asyncio.to_thread(
+                self._transcribe_local, io.BytesIO(audio_bytes)
+            )
+        else:
+            audio_buffer = io.BytesIO(audio_bytes)
+            audio_buffer.name = "audio.m4a"
             transcription = await self.openai_client.audio.transcriptions.create(
                 model="whisper-1",
-                file=audio_file
+                file=audio_buffer
             )
-        return transcription.text
+            transcript = transcription.text
+
+        await asyncio.to_thread(_transcript_cache_write, digest, transcript)
+        return transcript
+
+    def _transcribe_local(self, audio_buffer: io.BytesIO) -> str:
+        # beam_size=1 贪心解码换速度, vad_filter 直接跳过静音段
+        segments, _ = self._local_whisper.transcribe(
+            audio_buffer, beam_size=1, vad_filter=True
+        )
+        return "".join(segment.text for segment in segments)
+
+    async def _get_httpx_client(self) -> httpx.AsyncClient:
+        if self._httpx_client is not None and not self._httpx_client.is_closed:
+            return self._httpx_client
+        # 并发的首次调用会同时看到 None; 锁内复查, 避免同一实例
+        # 获取两次引用而 terminate() 只释放一次
+        async with self._httpx_client_lock:
+            if self._httpx_client is None or self._httpx_client.is_closed:
+                self._httpx_client = await _acquire_shared_client()
+        return self._httpx_client
 
     async def _summarize_text(self, text: str) -> str:
-        headers = {
-            "Authorization": f"Bearer {self.dify_api_key}",
-            "Content-Type": "application/json"
-        }
-        
+        if len(text) <= _MAP_REDUCE_THRESHOLD:
+            return await self._call_dify(text)
+
+        # map-reduce: 并行总结各块 (HTTP/2 下复用同一连接),
+        # 串行的 LLM 延迟变成 max(各块) + 一次简短的合并调用
+        chunks = _split_text(text, _MAP_CHUNK_CHARS)
+        partials = await asyncio.gather(*(self._call_dify(chunk) for chunk in chunks))
+        return await self._call_dify("\n\n".join(partials))
+
+    async def _call_dify(self, text: str) -> str:
         payload = {
             "inputs": {
+                "system_prefix": _DIFY_SYSTEM_PREFIX,
                 self.dify_input_variable: text
             },
-            "response_mode": "blocking",
+            "response_mode": "streaming",
             "user": "astrbot-url-summarizer"
         }
-        
-        response = await self.httpx_client.post(self.dify_workflow_url, json=payload, headers=headers)
+
+        client = await self._get_httpx_client()
+        try:
+            return await self._summarize_streaming(client, payload, self._dify_headers)
+        except (httpx.HTTPStatusError, ValueError) as e:
+            # 部分网关/旧版 Dify 不支持 streaming, 退回 blocking 模式
+            logger.error(f"URLSummarizer: streaming 总结失败, 退回 blocking 模式: {e}")
+            payload["response_mode"] = "blocking"
+            return await self._summarize_blocking(client, payload, self._dify_headers)
+
+    async def _summarize_streaming(self, client: httpx.AsyncClient,
+                                   payload: dict, headers: dict) -> str:
+        # streaming 模式下 LLM 产出第一个 token 就开始回传,
+        # 连接不再空等整段补全; 按 SSE 逐行解析并拼出完整答案
+        pieces = []
+        final_outputs = None
+        # 大转录文稿的序列化/反序列化走 orjson, 比 stdlib json 快数倍;
+        # Content-Type 已在预构建的请求头里
+        async with client.stream("POST", self.dify_workflow_url,
+                                 content=orjson.dumps(payload),
+                                 headers=headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                chunk = line[len("data:"):].strip()
+                if not chunk or chunk == "[DONE]":
+                    continue
+                try:
+                    event_data = orjson.loads(chunk)
+                except ValueError:
+                    continue
+                if event_data.get("event") == "text_chunk":
+                    pieces.append(event_data.get("data", {}).get("text", ""))
+                elif event_data.get("event") == "workflow_finished":
+                    final_outputs = event_data.get("data", {}).get("outputs")
+
+        if isinstance(final_outputs, dict):
+            return self._extract_answer({"outputs": final_outputs})
+        if pieces:
+            return "".join(pieces)
+        raise ValueError("Dify streaming 响应中没有任何输出。")
+
+    async def _summarize_blocking(self, client: httpx.AsyncClient,
+                                  payload: dict, headers: dict) -> str:
+        response = await client.post(self.dify_workflow_url,
+                                     content=orjson.dumps(payload), headers=headers)
         response.raise_for_status()
-        
-        data = response.json()
-        
+        return self._extract_answer(orjson.loads(response.content))
+
+    def _extract_answer(self, data: dict) -> str:
+        if self._answer_getter is not None:
+            try:
+                return self._answer_getter(data)
+            except (KeyError, TypeError):
+                # 工作流 schema 变了, 丢掉旧取值器重新探测
+                self._answer_getter = None
+
         key = self.dify_answer_key
-        
+
         if 'outputs' in data and key in data['outputs']:
+            outputs_getter = operator.itemgetter(key)
+            self._answer_getter = lambda d: outputs_getter(d['outputs'])
             return data['outputs'][key]
         elif key in data:
+            self._answer_getter = operator.itemgetter(key)
             return data[key]
         else:
             logger.error(f"Dify API 响应中未找到 '{key}': {data}")
             raise ValueError("Dify API 响应格式不符合预期。")
 
     async def terminate(self):
-        if self.is_configured:
-            await self.httpx_client.aclose()
\ No newline at end of file
+        if self._ytdlp_pool is not None:
+            self._ytdlp_pool.shutdown(wait=False, cancel_futures=True)
+        if self._httpx_client is not None:
+            self._httpx_client = None
+            await _release_shared_client()
\ No newline at end of file